@@ -1,19 +1,17 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import calendar
+import copy
+import importlib.util
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 
-# Import the ML model class
-try:
-    from expense_predictor_model import ExpensePredictor
-    MODEL_AVAILABLE = True
-except ImportError:
-    MODEL_AVAILABLE = False
+# The ML model module (and scikit-learn with it) is imported on the model
+# loading thread; here we only check that it is present
+MODEL_AVAILABLE = importlib.util.find_spec("expense_predictor_model") is not None
+if not MODEL_AVAILABLE:
     st.warning("⚠️ ML model not available. Please ensure expense_predictor_model.py exists.")
 
 # Page configuration
@@ -43,6 +41,8 @@ if "data_storage" not in st.session_state:
         "cash_expenses": {},
         "fixed_expenses": []
     }
+if "data_version" not in st.session_state:
+    st.session_state.data_version = 0
 
 # Categories
 CATEGORIES = [
@@ -52,12 +52,25 @@ CATEGORIES = [
     "Entertainment", "Bank charge", "Travel", "Saving/Investment", "Medical Expenses", "Self Care"
 ]
 
+# Selectbox index of each category (0 is the "Select Category" placeholder);
+# the same ids are stored in the transaction frame, with 0 meaning no category
+CATEGORY_TO_IDX = {c: i + 1 for i, c in enumerate(CATEGORIES)}
+CATEGORY_NAMES = np.array(["", *CATEGORIES], dtype=object)
+
+# Category selectbox options with the placeholder first
+CATEGORY_OPTIONS = ("Select Category", *CATEGORIES)
+
+# Below this many training records, predictions fall back to per-category averages
+MIN_MODEL_TRAINING_ROWS = 50
+
+# data_storage sections, stored by index as the uint8 "kind" column of the transaction frame
+RECORD_KINDS = ("bank_expenses", "cash_expenses", "fixed_expenses")
+FIXED_KIND = RECORD_KINDS.index("fixed_expenses")
+
 # Load ML Model
-@st.cache_resource
-def load_ml_model():
-    """Load the ML model for predictions"""
-    if not MODEL_AVAILABLE:
-        return None
+def _build_and_load_model():
+    """Load the saved ML model, creating a sample one first if it doesn't exist"""
+    from expense_predictor_model import ExpensePredictor, create_sample_model
     
     model = ExpensePredictor()
     model_path = "model/expense_predictor.joblib"
@@ -68,85 +81,141 @@ def load_ml_model():
             return model
     
     # If model doesn't exist, create a sample one
-    st.info("Creating ML model for predictions...")
-    try:
-        from expense_predictor_model import create_sample_model
-        if create_sample_model():
-            success, message = model.load_model(model_path)
-            if success:
-                return model
-    except Exception as e:
-        st.error(f"Error creating model: {e}")
+    if create_sample_model():
+        success, message = model.load_model(model_path)
+        if success:
+            return model
     
     return None
 
+@st.cache_resource
+def _model_future():
+    """Start loading the ML model on a background thread, once per server process"""
+    return ThreadPoolExecutor(max_workers=1).submit(_build_and_load_model)
+
+def load_ml_model(future):
+    """Get the ML model from a finished load; None if the model is unavailable or loading failed"""
+    if future is None:
+        return None
+    
+    if future.exception() is not None:
+        st.error(f"Error creating model: {future.exception()}")
+        return None
+    
+    return future.result()
+
 # Utility functions
 def set_active_tab(tab_name):
     st.session_state.active_tab = tab_name
 
-def get_period_data():
-    """Get data for the current period and offset"""
+def decode_category(category_ids):
+    """Map category ids from the transaction frame back to their names"""
+    return CATEGORY_NAMES[category_ids]
+
+def bump_data_version():
+    """Mark data_storage as changed so derived views get rebuilt"""
+    st.session_state.data_version += 1
+
+def clear_records(source, date_str):
+    """Button callback: remove all records of a source for the given date"""
+    if st.session_state.data_storage[source].get(date_str):
+        st.session_state.data_storage[source][date_str] = []
+        bump_data_version()
+
+def add_record_row(source, date_str):
+    """Button callback: append an empty record row for the given date"""
+    st.session_state.data_storage[source].setdefault(date_str, []).append({
+        "description": "",
+        "income": 0.0,
+        "expense": 0.0,
+        "category": ""
+    })
+    bump_data_version()
+
+def _build_txn_frame():
+    """Flatten all stored transactions into one DataFrame, rebuilt only when the data changes"""
+    cached = st.session_state.get("txn_frame")
+    if cached is not None and cached[0] == st.session_state.data_version:
+        return cached[1]
+    
+    storage = st.session_state.data_storage
+    dates, incomes, expenses, category_ids, kinds = [], [], [], [], []
+    
+    # Online and Cash Transaction expenses
+    for kind, source in enumerate(RECORD_KINDS[:FIXED_KIND]):
+        for date_str, txns in storage[source].items():
+            for exp in txns:
+                dates.append(date_str)
+                incomes.append(exp["income"])
+                expenses.append(exp["expense"])
+                category_ids.append(CATEGORY_TO_IDX.get(exp.get("category", ""), 0))
+                kinds.append(kind)
+    
+    # Fixed expenses
+    for expense in storage["fixed_expenses"]:
+        dates.append(expense["date"])
+        incomes.append(expense["income"])
+        expenses.append(expense["expense"])
+        category_ids.append(CATEGORY_TO_IDX.get(expense.get("category", ""), 0))
+        kinds.append(FIXED_KIND)
+    
+    parsed = pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce")
+    df = pd.DataFrame({
+        "date": parsed,
+        # Epoch nanoseconds for plain int64 range masks (NaT sorts below every date)
+        "date_ns": parsed.to_numpy(dtype="datetime64[ns]").view(np.int64),
+        "income": np.asarray(incomes, dtype=np.float64),
+        "expense": np.asarray(expenses, dtype=np.float64),
+        "category_id": np.asarray(category_ids, dtype=np.uint8),
+        "kind": np.asarray(kinds, dtype=np.uint8)
+    })
+    # Keep rows in date order so period lookups can binary-search the range
+    df = df.sort_values("date_ns", kind="stable", ignore_index=True)
+    st.session_state.txn_frame = (st.session_state.data_version, df)
+    return df
+
+def get_period_data(period, offset, version):
+    """Get data for a period and offset, memoized until the data version changes"""
     today = datetime.today()
     
-    if st.session_state.selected_period == "Week":
-        start_date = today - timedelta(days=today.weekday()) + timedelta(weeks=st.session_state.period_offset)
+    # Navigation reruns reuse earlier results; records are dated at midnight,
+    # so the totals for a key only change with the data or the day
+    cache = st.session_state.get("period_data_cache")
+    if cache is None or cache["version"] != version:
+        cache = st.session_state.period_data_cache = {"version": version, "entries": {}}
+    key = (period, offset, today.date())
+    if key in cache["entries"]:
+        return cache["entries"][key]
+    
+    if period == "Week":
+        start_date = today - timedelta(days=today.weekday()) + timedelta(weeks=offset)
         end_date = start_date + timedelta(days=6)
-    elif st.session_state.selected_period == "Month":
-        if st.session_state.period_offset == 0:
+    elif period == "Month":
+        if offset == 0:
             start_date = today.replace(day=1)
             end_date = today
         else:
-            target_month = today.month + st.session_state.period_offset
-            target_year = today.year
-            while target_month > 12:
-                target_month -= 12
-                target_year += 1
-            while target_month < 1:
-                target_month += 12
-                target_year -= 1
+            year_offset, month_index = divmod(today.month - 1 + offset, 12)
+            target_year = today.year + year_offset
+            target_month = month_index + 1
             start_date = datetime(target_year, target_month, 1)
             last_day = calendar.monthrange(target_year, target_month)[1]
             end_date = datetime(target_year, target_month, last_day)
     else:  # Year
-        target_year = today.year + st.session_state.period_offset
+        target_year = today.year + offset
         start_date = datetime(target_year, 1, 1)
         end_date = datetime(target_year, 12, 31)
     
-    # Calculate data from session state
-    total_income = 0
-    total_expense = 0
-    
-    # Online Transaction expenses (previously Bank expenses)
-    for date_str, expenses in st.session_state.data_storage["bank_expenses"].items():
-        try:
-            expense_date = datetime.strptime(date_str, "%Y-%m-%d")
-            if start_date <= expense_date <= end_date:
-                total_income += sum(float(exp.get("income", 0)) for exp in expenses)
-                total_expense += sum(float(exp.get("expense", 0)) for exp in expenses)
-        except (ValueError, TypeError):
-            continue
+    # Binary-search the date-sorted frame for the period and sum only that slice
+    df = _build_txn_frame()
+    dates_ns = df["date_ns"].to_numpy()
+    start_ns = np.datetime64(start_date, "ns").astype(np.int64)
+    end_ns = np.datetime64(end_date, "ns").astype(np.int64)
+    lo = np.searchsorted(dates_ns, start_ns, side="left")
+    hi = np.searchsorted(dates_ns, end_ns, side="right")
+    total_income, total_expense = df[["income", "expense"]].to_numpy()[lo:hi].sum(axis=0).tolist()
     
-    # Cash Transaction expenses (previously Cash expenses)
-    for date_str, expenses in st.session_state.data_storage["cash_expenses"].items():
-        try:
-            expense_date = datetime.strptime(date_str, "%Y-%m-%d")
-            if start_date <= expense_date <= end_date:
-                total_income += sum(float(exp.get("income", 0)) for exp in expenses)
-                total_expense += sum(float(exp.get("expense", 0)) for exp in expenses)
-        except (ValueError, TypeError):
-            continue
-    
-    # Fixed expenses
-    for expense in st.session_state.data_storage["fixed_expenses"]:
-        try:
-            exp_date = datetime.strptime(expense["date"], "%Y-%m-%d")
-            if start_date <= exp_date <= end_date:
-                total_income += float(expense.get("income", 0))
-                total_expense += float(expense.get("expense", 0))
-        except (ValueError, TypeError):
-            continue
-    
-    return {
+    cache["entries"][key] = {
         "income": total_income,
         "expense": total_expense,
         "savings": total_income - total_expense,
@@ -155,263 +224,92 @@ def get_period_data():
         "cash_income": total_income * 0.2,
         "cash_expense": total_expense * 0.15
     }
-
-# Enhanced Mobile-Friendly CSS
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-
-* {
-    font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif !important;
-    margin: 0;
-    padding: 0;
-    box-sizing: border-box;
-}
-
-/* Mobile-First Responsive Design */
-.stApp {
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    min-height: 100vh;
-    color: #333;
-}
-
-.block-container {
-    max-width: 100% !important;
-    padding: 1rem !important;
-}
-
-/* Mobile Header */
-.header {
-    text-align: center;
-    margin-bottom: 1.5rem;
-    color: white;
-    padding: 1rem 0;
-}
-
-.header h1 {
-    font-size: 1.8rem;
-    font-weight: 700;
-    margin-bottom: 0.5rem;
-    text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-    color: white;
-}
-
-.header p {
-    font-size: 1rem;
-    opacity: 0.9;
-    color: white;
-}
-
-/* Mobile Cards */
-.balance-card {
-    background: white;
-    border-radius: 12px;
-    padding: 1rem;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-    margin-bottom: 1rem;
-    transition: all 0.3s ease;
-}
-
-.balance-card:hover {
-    transform: translateY(-2px);
-    box-shadow: 0 6px 16px rgba(0,0,0,0.15);
-}
-
-.balance-card h3 {
-    color: #667eea;
-    margin-bottom: 0.75rem;
-    font-size: 1rem;
-    font-weight: 600;
-}
-
-.balance-row {
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    margin-bottom: 0.5rem;
-    padding: 0.25rem 0;
-    border-bottom: 1px solid #f0f0f0;
-}
-
-.balance-row:last-child {
-    border-bottom: none;
-    font-weight: bold;
-    margin-top: 0.5rem;
-    padding-top: 0.75rem;
-    border-top: 2px solid #667eea;
-}
-
-.balance-label {
-    font-weight: 500;
-    color: #555;
-    font-size: 0.9rem;
-}
-
-.balance-amount {
-    font-weight: bold;
-    font-size: 0.9rem;
-}
-
-/* Mobile Buttons */
-.stButton > button {
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-    color: white !important;
-    border: none !important;
-    padding: 0.75rem 1rem !important;
-    border-radius: 8px !important;
-    font-size: 14px !important;
-    font-weight: 600 !important;
-    cursor: pointer !important;
-    transition: all 0.3s ease !important;
-    box-shadow: 0 2px 8px rgba(102, 126, 234, 0.3) !important;
-    width: 100% !important;
-    min-height: 44px !important;
-}
-
-.stButton > button:hover {
-    transform: translateY(-1px) !important;
-    box-shadow: 0 4px 12px rgba(102, 126, 234, 0.4) !important;
-}
-
-
-/* Mobile Navigation */
-.tab-nav {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(120px, 1fr));
-    gap: 0.5rem;
-    margin-bottom: 1rem;
-}
-
-.tab-nav button {
-    padding: 0.75rem 0.5rem !important;
-    font-size: 12px !important;
-    white-space: nowrap !important;
-    overflow: hidden !important;
-    text-overflow: ellipsis !important;
-}
-
-/* Mobile Tables */
-.stDataFrame {
-    font-size: 12px !important;
-    overflow-x: auto !important;
-}
-
-.stDataFrame table {
-    min-width: 100% !important;
-}
-
-/* Mobile Charts */
-.chart-container {
-    background: white;
-    border-radius: 12px;
-    padding: 1rem;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-    margin: 1rem 0;
-}
-
-/* Mobile Responsive Grid */
-.mobile-grid {
-    display: grid;
-    grid-template-columns: 1fr;
-    gap: 1rem;
-}
-
-@media (min-width: 768px) {
-    .mobile-grid {
-        grid-template-columns: repeat(2, 1fr);
-    }
-    
-    .header h1 {
-        font-size: 2.5rem;
-    }
-    
-    .balance-card {
-        padding: 1.5rem;
-    }
-    
-    .tab-nav {
-        grid-template-columns: repeat(5, 1fr);
-    }
-}
-
-@media (min-width: 1024px) {
-    .mobile-grid {
-        grid-template-columns: repeat(3, 1fr);
-    }
-    
-    .block-container {
-        max-width: 1200px !important;
-        margin: 0 auto !important;
-        padding: 2rem 1rem !important;
-    }
-}
-
-/* Color classes */
-.income { color: #2ecc71; }
-.expense { color: #e74c3c; }
-.balance { color: #667eea; }
-.pending { color: #f39c12; }
-
-/* Success/Error messages */
-.stSuccess {
-    background: #d4edda !important;
-    border: 1px solid #c3e6cb !important;
-    color: #155724 !important;
-    border-radius: 8px !important;
-    padding: 1rem !important;
-    margin: 1rem 0 !important;
-}
-
-.stError {
-    background: #f8d7da !important;
-    border: 1px solid #f5c6cb !important;
-    color: #721c24 !important;
-    border-radius: 8px !important;
-    padding: 1rem !important;
-    margin: 1rem 0 !important;
-}
-
-.stWarning {
-    background: #fff3cd !important;
-    border: 1px solid #ffeeba !important;
-    color: #856404 !important;
-    border-radius: 8px !important;
-    padding: 1rem !important;
-    margin: 1rem 0 !important;
-}
-
-/* Hide Streamlit elements */
-#MainMenu { visibility: hidden; }
-footer { visibility: hidden; }
-.stDeployButton { display: none; }
-header { visibility: hidden; }
-
-
-/* Mobile touch targets */
-@media (max-width: 768px) {
-    .stButton > button {
-        min-height: 48px !important;
-        font-size: 16px !important;
-    }
+    return cache["entries"][key]
+
+def build_training_data(version):
+    """Get model training records and their categories, rebuilt only when the data changes"""
+    cached = st.session_state.get("training_data")
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+    
+    # Categorized online/cash records plus every fixed record, straight from the columnar frame
+    df = _build_txn_frame()
+    category_ids = df["category_id"].to_numpy()
+    mask = (category_ids != 0) | (df["kind"].to_numpy() == FIXED_KIND)
+    expense = df["expense"].to_numpy()[mask]
+    training_df = pd.DataFrame({
+        "date": df["date"].to_numpy()[mask],
+        # Ids are 1-based category codes, so the column is categorical without hashing names
+        "category": pd.Categorical.from_codes(category_ids[mask].astype(np.int16) - 1, categories=CATEGORIES),
+        "total_expense": expense,
+        "total_income": df["income"].to_numpy()[mask],
+        "transaction_type": np.where(expense > 0, "expense", "income")
+    })
+    unique_categories = pd.unique(training_df["category"].dropna()).tolist()
+    st.session_state.training_data = (version, training_df, unique_categories)
+    return training_df, unique_categories
+
+def get_analytics_data(start_date, end_date, version):
+    """Aggregate categorized online/cash records in a date range, memoized until the data version changes"""
+    cache = st.session_state.get("analytics_cache")
+    if cache is None or cache["version"] != version:
+        cache = st.session_state.analytics_cache = {"version": version, "entries": {}}
+    key = (start_date, end_date)
+    if key in cache["entries"]:
+        return cache["entries"][key]
+    
+    # Binary-search the date range, then keep categorized online and cash records
+    df = _build_txn_frame()
+    dates_ns = df["date_ns"].to_numpy()
+    lo = np.searchsorted(dates_ns, np.datetime64(start_date, "ns").astype(np.int64), side="left")
+    hi = np.searchsorted(dates_ns, np.datetime64(end_date, "ns").astype(np.int64), side="right")
+    df = df.iloc[lo:hi]
+    df = df.loc[(df["kind"].to_numpy() != FIXED_KIND) & (df["category_id"].to_numpy() != 0)]
+    
+    if df.empty:
+        cache["entries"][key] = None
+        return None
     
-    .stTextInput > div > div > input,
-    .stNumberInput > div > div > input,
-    .stSelectbox > div > div,
-    .stDateInput > div > div > input {
-        min-height: 48px !important;
-        font-size: 16px !important;
+    income = df["income"].to_numpy()
+    expense = df["expense"].to_numpy()
+    
+    # Sum expenses per category id in a single pass
+    expense_sums = np.bincount(df["category_id"].to_numpy(), weights=expense, minlength=len(CATEGORY_NAMES))
+    category_ids = np.flatnonzero(expense_sums > 0)
+    category_ids = category_ids[np.argsort(-expense_sums[category_ids], kind="stable")]
+    
+    # datetime64[M] formats as YYYY-MM in one vectorized cast
+    months, month_idx = np.unique(df["date"].to_numpy().astype("datetime64[M]"), return_inverse=True)
+    
+    cache["entries"][key] = {
+        "income": float(income.sum()),
+        "expense": float(expense.sum()),
+        "categories": tuple(decode_category(category_ids)),
+        "category_expense": tuple(expense_sums[category_ids].tolist()),
+        "months": tuple(months.astype(str).tolist()),
+        "monthly_income": tuple(np.bincount(month_idx, weights=income, minlength=len(months)).tolist()),
+        "monthly_expense": tuple(np.bincount(month_idx, weights=expense, minlength=len(months)).tolist())
     }
-}
-</style>
-""", unsafe_allow_html=True)
+    return cache["entries"][key]
 
-# Header
-st.markdown("""
+# Enhanced Mobile-Friendly CSS and Header
+@st.cache_resource
+def load_page_head():
+    """Build the stylesheet and header HTML once per server process"""
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "app.css")
+    with open(css_path) as f:
+        css = f.read()
+    return f"""<style>
+{css}</style>
 <div class="header">
     <h1>💰 ExpenseTracker Pro</h1>
     <p>Smart Personal Finance Manager</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+# Streamlit drops elements a rerun does not emit again, so this has to run
+# every time; one element keeps that to a single markdown call
+st.markdown(load_page_head(), unsafe_allow_html=True)
 
 # Tab Navigation
 st.markdown('<div class="tab-nav">', unsafe_allow_html=True)
@@ -451,71 +349,54 @@ if st.session_state.active_tab:
         st.rerun()
 
 # Main Content
+def _balance_card_html(title, income, expense, balance_label, balance):
+    """Build one balance card with income, expense and balance rows"""
+    return f"""<div class="balance-card">
+    <h3>{title}</h3>
+    <div class="balance-row">
+        <span class="balance-label">Income:</span>
+        <span class="balance-amount income">₹{income:,.0f}</span>
+    </div>
+    <div class="balance-row">
+        <span class="balance-label">Expense:</span>
+        <span class="balance-amount expense">₹{expense:,.0f}</span>
+    </div>
+    <div class="balance-row">
+        <span class="balance-label">{balance_label}:</span>
+        <span class="balance-amount balance">₹{balance:,.0f}</span>
+    </div>
+</div>
+"""
+
+@st.cache_data(show_spinner=False)
+def _cards_html(bank_income, bank_expense, cash_income, cash_expense, income, expense, savings):
+    """Build the three dashboard summary cards for the given totals"""
+    return (
+        _balance_card_html("💳 Online Records", bank_income, bank_expense, "Balance", bank_income - bank_expense),
+        _balance_card_html("💵 Cash Records", cash_income, cash_expense, "Balance", cash_income - cash_expense),
+        _balance_card_html("📊 Total", income, expense, "Savings", savings)
+    )
+
 def show_dashboard():
     """Main dashboard"""
-    period_data = get_period_data()
+    period_data = get_period_data(
+        st.session_state.selected_period,
+        st.session_state.period_offset,
+        st.session_state.data_version
+    )
     
     # Summary cards
-    st.markdown('<div class="mobile-grid">', unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="balance-card">
-            <h3>💳 Online Records</h3>
-            <div class="balance-row">
-                <span class="balance-label">Income:</span>
-                <span class="balance-amount income">₹{period_data['bank_income']:,.0f}</span>
-            </div>
-            <div class="balance-row">
-                <span class="balance-label">Expense:</span>
-                <span class="balance-amount expense">₹{period_data['bank_expense']:,.0f}</span>
-            </div>
-            <div class="balance-row">
-                <span class="balance-label">Balance:</span>
-                <span class="balance-amount balance">₹{period_data['bank_income'] - period_data['bank_expense']:,.0f}</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    cards = _cards_html(
+        period_data['bank_income'], period_data['bank_expense'],
+        period_data['cash_income'], period_data['cash_expense'],
+        period_data['income'], period_data['expense'], period_data['savings']
+    )
     
-    with col2:
-        st.markdown(f"""
-        <div class="balance-card">
-            <h3>💵 Cash Records</h3>
-            <div class="balance-row">
-                <span class="balance-label">Income:</span>
-                <span class="balance-amount income">₹{period_data['cash_income']:,.0f}</span>
-            </div>
-            <div class="balance-row">
-                <span class="balance-label">Expense:</span>
-                <span class="balance-amount expense">₹{period_data['cash_expense']:,.0f}</span>
-            </div>
-            <div class="balance-row">
-                <span class="balance-label">Balance:</span>
-                <span class="balance-amount balance">₹{period_data['cash_income'] - period_data['cash_expense']:,.0f}</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown('<div class="mobile-grid">', unsafe_allow_html=True)
     
-    with col3:
-        st.markdown(f"""
-        <div class="balance-card">
-            <h3>📊 Total</h3>
-            <div class="balance-row">
-                <span class="balance-label">Income:</span>
-                <span class="balance-amount income">₹{period_data['income']:,.0f}</span>
-            </div>
-            <div class="balance-row">
-                <span class="balance-label">Expense:</span>
-                <span class="balance-amount expense">₹{period_data['expense']:,.0f}</span>
-            </div>
-            <div class="balance-row">
-                <span class="balance-label">Savings:</span>
-                <span class="balance-amount balance">₹{period_data['savings']:,.0f}</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    for col, card in zip(st.columns(3), cards):
+        with col:
+            st.markdown(card, unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -564,15 +445,16 @@ def show_bank_expenses():
     """Online Transaction expenses management"""
     st.markdown("### 💳 Online Records")
     
+    if "save_message" in st.session_state:
+        st.success(st.session_state.pop("save_message"))
+    
     # Date selection
     selected_date = st.date_input("Select Date", datetime.today())
-    date_str = selected_date.strftime("%Y-%m-%d")
+    date_str = selected_date.isoformat()
     
     # Get existing expenses for the date
-    if date_str in st.session_state.data_storage["bank_expenses"]:
-        current_expenses = st.session_state.data_storage["bank_expenses"][date_str]
-    else:
-        current_expenses = []
+    records = st.session_state.data_storage["bank_expenses"]
+    current_expenses = records.get(date_str, [])
     
     # Add empty row if needed
     if not current_expenses or (current_expenses and current_expenses[-1].get("description", "")):
@@ -595,25 +477,20 @@ def show_bank_expenses():
                 desc = st.text_input(f"Description {i+1}", value=exp.get("description", ""), key=f"bank_desc_{i}")
             
             with col2:
-                income = st.number_input(f"Income {i+1}", value=float(exp.get("income", 0)), min_value=0.0, key=f"bank_income_{i}")
+                income = st.number_input(f"Income {i+1}", value=exp["income"], min_value=0.0, key=f"bank_income_{i}")
             
             with col3:
-                expense = st.number_input(f"Expense {i+1}", value=float(exp.get("expense", 0)), min_value=0.0, key=f"bank_expense_{i}")
+                expense = st.number_input(f"Expense {i+1}", value=exp["expense"], min_value=0.0, key=f"bank_expense_{i}")
             
             with col4:
-                category_index = 0
                 current_category = exp.get("category", "")
                 
-                # Create options with placeholder
-                category_options = ["Select Category"] + CATEGORIES
-                
                 # Set index based on current category
-                if current_category and current_category in CATEGORIES:
-                    category_index = CATEGORIES.index(current_category) + 1
+                category_index = CATEGORY_TO_IDX.get(current_category, 0)
                 
                 category = st.selectbox(
                     f"Category {i+1}", 
-                    category_options, 
+                    CATEGORY_OPTIONS, 
                     index=category_index, 
                     key=f"bank_category_{i}"
                 )
@@ -634,8 +511,10 @@ def show_bank_expenses():
             valid_expenses = [exp for exp in new_expenses if exp["description"] and exp["category"]]
             
             if valid_expenses:
-                st.session_state.data_storage["bank_expenses"][date_str] = valid_expenses
-                st.success(f"✅ Saved {len(valid_expenses)} online records!")
+                records[date_str] = valid_expenses
+                bump_data_version()
+                # Rerun so the form redraws from the saved records; show the message after it
+                st.session_state.save_message = f"✅ Saved {len(valid_expenses)} online records!"
                 st.rerun()
             else:
                 st.warning("⚠️ Please fill in description and category for all transactions.")
@@ -644,35 +523,25 @@ def show_bank_expenses():
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("🗑️ Clear All", key="clear_bank"):
-            st.session_state.data_storage["bank_expenses"][date_str] = []
-            st.rerun()
+        st.button("🗑️ Clear All", key="clear_bank", on_click=clear_records, args=("bank_expenses", date_str))
     
     with col2:
-        if st.button("➕ Add Row", key="add_bank_row"):
-            if date_str not in st.session_state.data_storage["bank_expenses"]:
-                st.session_state.data_storage["bank_expenses"][date_str] = []
-            st.session_state.data_storage["bank_expenses"][date_str].append({
-                "description": "",
-                "income": 0.0,
-                "expense": 0.0,
-                "category": ""
-            })
-            st.rerun()
+        st.button("➕ Add Row", key="add_bank_row", on_click=add_record_row, args=("bank_expenses", date_str))
 
 def show_cash_expenses():
     """Cash Transaction expenses management"""
     st.markdown("### 💵 Cash Records")
     
+    if "save_message" in st.session_state:
+        st.success(st.session_state.pop("save_message"))
+    
     # Date selection
     selected_date = st.date_input("Select Date", datetime.today(), key="cash_date")
-    date_str = selected_date.strftime("%Y-%m-%d")
+    date_str = selected_date.isoformat()
     
     # Get existing expenses for the date
-    if date_str in st.session_state.data_storage["cash_expenses"]:
-        current_expenses = st.session_state.data_storage["cash_expenses"][date_str]
-    else:
-        current_expenses = []
+    records = st.session_state.data_storage["cash_expenses"]
+    current_expenses = records.get(date_str, [])
     
     # Add empty row if needed
     if not current_expenses or (current_expenses and current_expenses[-1].get("description", "")):
@@ -695,25 +564,20 @@ def show_cash_expenses():
                 desc = st.text_input(f"Description {i+1}", value=exp.get("description", ""), key=f"cash_desc_{i}")
             
             with col2:
-                income = st.number_input(f"Income {i+1}", value=float(exp.get("income", 0)), min_value=0.0, key=f"cash_income_{i}")
+                income = st.number_input(f"Income {i+1}", value=exp["income"], min_value=0.0, key=f"cash_income_{i}")
             
             with col3:
-                expense = st.number_input(f"Expense {i+1}", value=float(exp.get("expense", 0)), min_value=0.0, key=f"cash_expense_{i}")
+                expense = st.number_input(f"Expense {i+1}", value=exp["expense"], min_value=0.0, key=f"cash_expense_{i}")
             
             with col4:
-                category_index = 0
                 current_category = exp.get("category", "")
                 
-                # Create options with placeholder
-                category_options = ["Select Category"] + CATEGORIES
-                
                 # Set index based on current category
-                if current_category and current_category in CATEGORIES:
-                    category_index = CATEGORIES.index(current_category) + 1
+                category_index = CATEGORY_TO_IDX.get(current_category, 0)
                 
                 category = st.selectbox(
                     f"Category {i+1}", 
-                    category_options, 
+                    CATEGORY_OPTIONS, 
                     index=category_index, 
                     key=f"cash_category_{i}"
                 )
@@ -734,8 +598,10 @@ def show_cash_expenses():
             valid_expenses = [exp for exp in new_expenses if exp["description"] and exp["category"]]
             
             if valid_expenses:
-                st.session_state.data_storage["cash_expenses"][date_str] = valid_expenses
-                st.success(f"✅ Saved {len(valid_expenses)} cash records!")
+                records[date_str] = valid_expenses
+                bump_data_version()
+                # Rerun so the form redraws from the saved records; show the message after it
+                st.session_state.save_message = f"✅ Saved {len(valid_expenses)} cash records!"
                 st.rerun()
             else:
                 st.warning("⚠️ Please fill in description and category for all transactions.")
@@ -744,25 +610,15 @@ def show_cash_expenses():
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("🗑️ Clear All", key="clear_cash"):
-            st.session_state.data_storage["cash_expenses"][date_str] = []
-            st.rerun()
+        st.button("🗑️ Clear All", key="clear_cash", on_click=clear_records, args=("cash_expenses", date_str))
     
     with col2:
-        if st.button("➕ Add Row", key="add_cash_row"):
-            if date_str not in st.session_state.data_storage["cash_expenses"]:
-                st.session_state.data_storage["cash_expenses"][date_str] = []
-            st.session_state.data_storage["cash_expenses"][date_str].append({
-                "description": "",
-                "income": 0.0,
-                "expense": 0.0,
-                "category": ""
-            })
-            st.rerun()
+        st.button("➕ Add Row", key="add_cash_row", on_click=add_record_row, args=("cash_expenses", date_str))
 
 def show_fixed_expenses():
     """Fixed expenses management"""
     st.markdown("### 🔄 Fixed Records")
+    fixed_expenses = st.session_state.data_storage["fixed_expenses"]
     
     # Add new fixed expense
     with st.form("fixed_expense_form"):
@@ -784,35 +640,60 @@ def show_fixed_expenses():
             if description and category and (income > 0 or expense > 0):
                 new_fixed = {
                     "description": description,
-                    "date": start_date.strftime("%Y-%m-%d"),
-                    "end_date": end_date.strftime("%Y-%m-%d"),
+                    "date": start_date.isoformat(),
+                    "end_date": end_date.isoformat(),
                     "income": income,
                     "expense": expense,
                     "category": category
                 }
                 
-                st.session_state.data_storage["fixed_expenses"].append(new_fixed)
+                fixed_expenses.append(new_fixed)
+                bump_data_version()
                 st.success("✅ Fixed records added successfully!")
                 st.rerun()
             else:
                 st.warning("⚠️ Please fill in all required fields.")
     
     # Display existing fixed expenses
-    if st.session_state.data_storage["fixed_expenses"]:
+    if fixed_expenses:
         st.markdown("#### Your Fixed Expenses")
         
-        for i, expense in enumerate(st.session_state.data_storage["fixed_expenses"]):
+        for i, expense in enumerate(fixed_expenses):
             with st.expander(f"{expense['description']} - {expense['category']}"):
                 st.write(f"**Date Range:** {expense['date']} to {expense['end_date']}")
                 st.write(f"**Income:** ₹{expense['income']:,.0f}")
                 st.write(f"**Expense:** ₹{expense['expense']:,.0f}")
                 
                 if st.button(f"🗑️ Delete", key=f"delete_fixed_{i}"):
-                    st.session_state.data_storage["fixed_expenses"].pop(i)
+                    fixed_expenses.pop(i)
+                    bump_data_version()
                     st.rerun()
     else:
         st.info("No fixed expenses added yet.")
 
+@st.cache_data(show_spinner=False)
+def _expense_pie(categories, amounts, title):
+    """Build an expense pie chart as a plotly dict, reused across reruns with the same data"""
+    # Plotly is imported on first use so sessions that never chart skip its import cost
+    import plotly.express as px
+    
+    pie_df = pd.DataFrame({"category": list(categories), "expense": list(amounts)})
+    return px.pie(pie_df, values="expense", names="category", title=title).to_dict()
+
+@st.cache_data(show_spinner=False)
+def _monthly_trend_chart(months, income, expense):
+    """Build the monthly income vs expense bar chart as a plotly dict, reused across reruns with the same data"""
+    import plotly.graph_objects as go
+    
+    # Build the figure in one pass from a plain dict
+    return go.Figure({
+        "data": [
+            {"type": "bar", "x": list(months), "y": list(income), "name": "Income", "marker": {"color": "#2ecc71"}},
+            {"type": "bar", "x": list(months), "y": list(expense), "name": "Expense", "marker": {"color": "#e74c3c"}}
+        ],
+        "layout": {"title": {"text": "Monthly Income vs Expense Trend"}, "barmode": "group"}
+    }).to_dict()
+
 def show_analytics():
     """Analytics dashboard"""
     st.markdown("### 📊 Analytics")
@@ -826,49 +707,12 @@ def show_analytics():
     with col2:
         end_date = st.date_input("End Date", datetime.today())
     
-    # Collect data for the period
-    period_data = []
-    
-    # Online Transaction expenses (previously Bank expenses)
-    for date_str, expenses in st.session_state.data_storage["bank_expenses"].items():
-        try:
-            expense_date = datetime.strptime(date_str, "%Y-%m-%d")
-            if start_date <= expense_date.date() <= end_date:
-                for exp in expenses:
-                    if exp.get("category"):  # Only include if category exists
-                        period_data.append({
-                            "date": date_str,
-                            "category": exp["category"],
-                            "income": float(exp.get("income", 0)),
-                            "expense": float(exp.get("expense", 0)),
-                            "type": "Online Transaction"
-                        })
-        except (ValueError, TypeError):
-            continue
-    
-    # Cash Transaction expenses (previously Cash expenses)
-    for date_str, expenses in st.session_state.data_storage["cash_expenses"].items():
-        try:
-            expense_date = datetime.strptime(date_str, "%Y-%m-%d")
-            if start_date <= expense_date.date() <= end_date:
-                for exp in expenses:
-                    if exp.get("category"):  # Only include if category exists
-                        period_data.append({
-                            "date": date_str,
-                            "category": exp["category"],
-                            "income": float(exp.get("income", 0)),
-                            "expense": float(exp.get("expense", 0)),
-                            "type": "Cash Transaction"
-                        })
-        except (ValueError, TypeError):
-            continue
+    analytics = get_analytics_data(start_date, end_date, st.session_state.data_version)
     
-    if period_data:
-        df = pd.DataFrame(period_data)
-        
+    if analytics is not None:
         # Summary metrics
-        total_income = df["income"].sum()
-        total_expense = df["expense"].sum()
+        total_income = analytics["income"]
+        total_expense = analytics["expense"]
         net_balance = total_income - total_expense
         
         col1, col2, col3 = st.columns(3)
@@ -883,29 +727,13 @@ def show_analytics():
             st.metric("Net Balance", f"₹{net_balance:,.0f}")
         
         # Category breakdown
-        if total_expense > 0:
-            expense_df = df[df["expense"] > 0].groupby("category")["expense"].sum().reset_index()
-            expense_df = expense_df.sort_values("expense", ascending=False)
-            
-            if not expense_df.empty:
-                fig = px.pie(expense_df, values="expense", names="category", 
-                            title="Expense Breakdown by Category")
-                st.plotly_chart(fig, use_container_width=True)
+        if total_expense > 0 and analytics["categories"]:
+            fig = _expense_pie(analytics["categories"], analytics["category_expense"], "Expense Breakdown by Category")
+            st.plotly_chart(fig, use_container_width=True)
         
         # Monthly trend
-        df["date"] = pd.to_datetime(df["date"])
-        df["month"] = df["date"].dt.to_period("M")
-        monthly_df = df.groupby("month").agg({
-            "income": "sum",
-            "expense": "sum"
-        }).reset_index()
-        monthly_df["month"] = monthly_df["month"].astype(str)
-        
-        if not monthly_df.empty:
-            fig = go.Figure()
-            fig.add_trace(go.Bar(x=monthly_df["month"], y=monthly_df["income"], name="Income", marker_color="#2ecc71"))
-            fig.add_trace(go.Bar(x=monthly_df["month"], y=monthly_df["expense"], name="Expense", marker_color="#e74c3c"))
-            fig.update_layout(title="Monthly Income vs Expense Trend", barmode="group")
+        if analytics["months"]:
+            fig = _monthly_trend_chart(analytics["months"], analytics["monthly_income"], analytics["monthly_expense"])
             st.plotly_chart(fig, use_container_width=True)
         
     else:
@@ -915,9 +743,17 @@ def show_ai_predictions():
     """AI predictions using ML model"""
     st.markdown("### 🤖 AI Predictions")
     
-    # Load ML model
-    model = load_ml_model()
+    # Load ML model; the first visit starts a background load. The future is
+    # read once so a load finishing mid-run cannot be mistaken for a failure
+    future = _model_future() if MODEL_AVAILABLE else None
+    
+    if future is not None and not future.done():
+        st.info("⏳ ML model is warming up. This only happens once.")
+        if st.button("🔄 Check Again"):
+            st.rerun()
+        return
     
+    model = load_ml_model(future)
     if model is None:
         st.error("❌ ML model not available. Please ensure the model file exists.")
         if st.button("🔄 Try to Create Model"):
@@ -925,7 +761,9 @@ def show_ai_predictions():
                 from expense_predictor_model import create_sample_model
                 with st.spinner("Creating sample model..."):
                     if create_sample_model():
-                        st.success("✅ Sample model created! Please refresh the page.")
+                        st.success("✅ Sample model created!")
+                        # Load the new model on the next run
+                        _model_future.clear()
                         st.rerun()
                     else:
                         st.error("❌ Failed to create sample model.")
@@ -934,100 +772,94 @@ def show_ai_predictions():
         return
     
     # Prepare training data from current storage
-    training_data = []
-    
-    # Online Transaction expenses (previously Bank expenses)
-    for date_str, expenses in st.session_state.data_storage["bank_expenses"].items():
-        for exp in expenses:
-            if exp.get("category"):
-                training_data.append({
-                    "date": date_str,
-                    "category": exp["category"],
-                    "total_expense": float(exp.get("expense", 0)),
-                    "total_income": float(exp.get("income", 0)),
-                    "transaction_type": "expense" if exp.get("expense", 0) > 0 else "income"
-                })
-    
-    # Cash Transaction expenses (previously Cash expenses)
-    for date_str, expenses in st.session_state.data_storage["cash_expenses"].items():
-        for exp in expenses:
-            if exp.get("category"):
-                training_data.append({
-                    "date": date_str,
-                    "category": exp["category"],
-                    "total_expense": float(exp.get("expense", 0)),
-                    "total_income": float(exp.get("income", 0)),
-                    "transaction_type": "expense" if exp.get("expense", 0) > 0 else "income"
-                })
-    
-    # Fixed expenses
-    for exp in st.session_state.data_storage["fixed_expenses"]:
-        training_data.append({
-            "date": exp["date"],
-            "category": exp["category"],
-            "total_expense": float(exp.get("expense", 0)),
-            "total_income": float(exp.get("income", 0)),
-            "transaction_type": "expense" if exp.get("expense", 0) > 0 else "income"
-        })
+    training_data, unique_categories = build_training_data(st.session_state.data_version)
     
     if st.button("🚀 Generate Predictions"):
-        if not training_data:
+        if training_data.empty:
             st.warning("⚠️ No data available for predictions. Please add some transactions first.")
             return
         
         with st.spinner("Training model and generating predictions..."):
             try:
-                # Retrain model with current data
-                success, message = model.train(training_data)
+                # Reuse the last fit when neither the data nor the categories changed
+                fit_key = (st.session_state.data_version, tuple(sorted(unique_categories)))
+                if st.session_state.get("last_fit_key") == fit_key:
+                    success = True
+                    message, predictions = st.session_state.last_predictions
+                else:
+                    if len(training_data) < MIN_MODEL_TRAINING_ROWS:
+                        # Too little data for the model to beat each category's average
+                        success = True
+                        message = f"Predicted category averages from {len(training_data)} records"
+                        predictions = (
+                            training_data.groupby("category", observed=True)[["total_expense", "total_income"]].mean()
+                            .rename(columns={"total_expense": "predicted_expense", "total_income": "predicted_income"})
+                            .assign(expense_confidence=50.0, income_confidence=50.0)
+                            .reset_index()
+                            .to_dict("records")
+                        )
+                    else:
+                        # Retrain a private copy; the loaded model is shared by every session
+                        model = copy.deepcopy(model)
+                        success, message = model.train(training_data)
+                        
+                        if success:
+                            # Generate predictions for all categories
+                            predictions = model.predict_next_month(unique_categories)
+                    
+                    if success:
+                        st.session_state.last_fit_key = fit_key
+                        st.session_state.last_predictions = (message, predictions)
                 
                 if success:
                     st.success(f"✅ {message}")
                     
-                    # Generate predictions for all categories
-                    unique_categories = list(set(exp["category"] for exp in training_data if exp.get("category")))
-                    predictions = model.predict_next_month(unique_categories)
-                    
                     if predictions:
-                        # Display predictions
-                        st.markdown("#### 📈 Next Month Predictions")
+                        # Render lists and summary as one markdown element
+                        sections = ["#### 📈 Next Month Predictions"]
                         
                         pred_df = pd.DataFrame(predictions)
+                        predicted_expense = pred_df["predicted_expense"].to_numpy()
+                        predicted_income = pred_df["predicted_income"].to_numpy()
                         
                         # Expense predictions
-                        expense_preds = pred_df[pred_df["predicted_expense"] > 0]
+                        expense_preds = pred_df.iloc[predicted_expense > 0]
                         if not expense_preds.empty:
-                            st.markdown("**💸 Predicted Expenses**")
-                            for _, pred in expense_preds.iterrows():
-                                st.write(f"**{pred['category']}:** ₹{pred['predicted_expense']:,.0f} (Confidence: {pred['expense_confidence']:.1f}%)")
+                            lines = (
+                                "**" + expense_preds["category"] + ":** ₹"
+                                + expense_preds["predicted_expense"].map("{:,.0f}".format)
+                                + " (Confidence: " + expense_preds["expense_confidence"].map("{:.1f}".format) + "%)"
+                            )
+                            sections += ["**💸 Predicted Expenses**", "  \n".join(lines.tolist())]
                         
                         # Income predictions
-                        income_preds = pred_df[pred_df["predicted_income"] > 0]
+                        income_preds = pred_df.iloc[predicted_income > 0]
                         if not income_preds.empty:
-                            st.markdown("**💰 Predicted Income**")
-                            for _, pred in income_preds.iterrows():
-                                st.write(f"**{pred['category']}:** ₹{pred['predicted_income']:,.0f} (Confidence: {pred['income_confidence']:.1f}%)")
+                            lines = (
+                                "**" + income_preds["category"] + ":** ₹"
+                                + income_preds["predicted_income"].map("{:,.0f}".format)
+                                + " (Confidence: " + income_preds["income_confidence"].map("{:.1f}".format) + "%)"
+                            )
+                            sections += ["**💰 Predicted Income**", "  \n".join(lines.tolist())]
                         
                         # Summary
-                        total_pred_expense = pred_df["predicted_expense"].sum()
-                        total_pred_income = pred_df["predicted_income"].sum()
+                        total_pred_expense = float(predicted_expense.sum())
+                        total_pred_income = float(predicted_income.sum())
                         pred_savings = total_pred_income - total_pred_expense
                         
-                        st.markdown("#### 📊 Prediction Summary")
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            st.metric("Predicted Income", f"₹{total_pred_income:,.0f}")
-                        
-                        with col2:
-                            st.metric("Predicted Expense", f"₹{total_pred_expense:,.0f}")
-                        
-                        with col3:
-                            st.metric("Predicted Savings", f"₹{pred_savings:,.0f}")
+                        sections += [
+                            "#### 📊 Prediction Summary",
+                            _balance_card_html("🔮 Next Month", total_pred_income, total_pred_expense, "Savings", pred_savings)
+                        ]
+                        st.markdown("\n\n".join(sections), unsafe_allow_html=True)
                         
                         # Visualization
                         if total_pred_expense > 0 and not expense_preds.empty:
-                            fig = px.pie(expense_preds, values="predicted_expense", names="category", 
-                                        title="Predicted Expense Distribution")
+                            fig = _expense_pie(
+                                tuple(expense_preds["category"].tolist()),
+                                tuple(expense_preds["predicted_expense"].tolist()),
+                                "Predicted Expense Distribution"
+                            )
                             st.plotly_chart(fig, use_container_width=True)
                     
                     else:
@@ -1038,18 +870,18 @@ def show_ai_predictions():
                 st.error(f"❌ Error during prediction: {str(e)}")
 
 # Main app logic
-if st.session_state.active_tab is None:
-    show_dashboard()
-elif st.session_state.active_tab == "bank":
-    show_bank_expenses()
-elif st.session_state.active_tab == "cash":
-    show_cash_expenses()
-elif st.session_state.active_tab == "fixed":
-    show_fixed_expenses()
-elif st.session_state.active_tab == "analytics":
-    show_analytics()
-elif st.session_state.active_tab == "ai":
-    show_ai_predictions()
+TAB_VIEWS = {
+    None: show_dashboard,
+    "bank": show_bank_expenses,
+    "cash": show_cash_expenses,
+    "fixed": show_fixed_expenses,
+    "analytics": show_analytics,
+    "ai": show_ai_predictions
+}
+
+view = TAB_VIEWS.get(st.session_state.active_tab)
+if view is not None:
+    view()
 
 # Footer
 st.markdown("---")